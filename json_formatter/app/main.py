@@ -1,65 +1,171 @@
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import HTMLResponse
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import HTMLResponse, ORJSONResponse
 from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter, ValidationError
 import json
+import os
+import re
+import hashlib
+import orjson
+from collections import OrderedDict
 from typing import Optional
 
-app = FastAPI(title="JSON Formatter & Validator")
+app = FastAPI(title="JSON Formatter & Validator", default_response_class=ORJSONResponse)
 
 class JSONInput(BaseModel):
+    """Request schema, only used for the OpenAPI docs"""
     text: str
     indent: Optional[int] = 4
 
 class JSONResponse(BaseModel):
+    """Response schema, only used for the OpenAPI docs"""
     success: bool
     formatted: Optional[str] = None
     error: Optional[str] = None
     error_line: Optional[int] = None
     error_column: Optional[int] = None
 
-@app.post("/api/format", response_model=JSONResponse)
-async def format_json(data: JSONInput):
+# Translation table for the single quote -> double quote fallback
+_QUOTE_TABLE = str.maketrans("'", '"')
+
+# Texts that may hold numbers orjson would not round-trip like the stdlib are
+# handled by the stdlib alone: runs of 19+ digits (orjson turns integers beyond
+# 64 bits into floats) and floats (orjson writes 1e16 where json writes 1e+16,
+# so the spelling would otherwise depend on the indent)
+_STDLIB_NUMBERS = re.compile(r"\d{19,}|\d[.eE]")
+
+def _parse(text: str) -> tuple:
+    """Parse JSON, returning the value and whether orjson parsed (and may serialize) it"""
+    if not _STDLIB_NUMBERS.search(text):
+        try:
+            return orjson.loads(text), True
+        except orjson.JSONDecodeError:
+            # NaN, Infinity, 1e400 and lone surrogates are only accepted by the stdlib,
+            # which also reports the error for input that is invalid either way
+            pass
+    return json.loads(text), False
+
+def _loads(text: str) -> tuple:
+    """Parse JSON, converting single quotes only if the text is not valid as-is"""
+    try:
+        return _parse(text)
+    except json.JSONDecodeError:
+        if "'" not in text:
+            raise
+        return _parse(text.translate(_QUOTE_TABLE))
+
+def _dumps(parsed, indent: Optional[int], use_orjson: bool) -> str:
+    """Serialize parsed JSON, using orjson for 2-space indentation of values it parsed"""
+    if indent == 2 and use_orjson:
+        try:
+            return orjson.dumps(parsed, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode()
+        except orjson.JSONEncodeError:
+            pass
+    # orjson only knows 2-space indentation, fall back to stdlib otherwise
+    return json.dumps(parsed, indent=indent, ensure_ascii=False)
+
+def _reformat(text: str, indent: Optional[int]) -> str:
+    """Parse and re-serialize JSON text"""
+    parsed, use_orjson = _loads(text)
+    return _dumps(parsed, indent, use_orjson)
+
+# Formatted output keyed by (digest of the input, indent), least recently used first.
+# Inputs longer than FORMAT_CACHE_MAX_TEXT characters are never cached.
+FORMAT_CACHE_SIZE = 1024
+FORMAT_CACHE_MAX_TEXT = 256 * 1024
+_format_cache: "OrderedDict[tuple, str]" = OrderedDict()
+
+def _format(text: str, indent: Optional[int]) -> str:
+    """Parse and re-serialize JSON text, reusing the result for recently seen inputs"""
+    if len(text) > FORMAT_CACHE_MAX_TEXT:
+        return _reformat(text, indent)
+    
+    key = (hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest(), indent)
+    formatted = _format_cache.get(key)
+    if formatted is not None:
+        _format_cache.move_to_end(key)
+        return formatted
+    
+    formatted = _reformat(text, indent)
+    _format_cache[key] = formatted
+    if len(_format_cache) > FORMAT_CACHE_SIZE:
+        _format_cache.popitem(last=False)
+    
+    return formatted
+
+def _error_position(e: json.JSONDecodeError) -> tuple:
+    """1-based line and column of a decode error, computed from its offset in the parsed document"""
+    line = e.doc.count("\n", 0, e.pos) + 1
+    column = e.pos - e.doc.rfind("\n", 0, e.pos)
+    return line, column
+
+# Lax validation for indent values that are not plain ints, e.g. 4.0 or "4",
+# so the endpoint keeps accepting what the JSONInput schema used to
+_INDENT_ADAPTER = TypeAdapter(Optional[int])
+
+def _parse_body(raw: bytes) -> tuple:
+    """Extract text and indent from a JSONInput body, only using pydantic for unusual indents"""
+    try:
+        body = orjson.loads(raw)
+        text = body["text"]
+        indent = body.get("indent", 4)
+    except (ValueError, KeyError, TypeError, AttributeError):
+        raise HTTPException(status_code=400, detail="Body must be a JSON object with a 'text' field")
+    
+    if not isinstance(text, str):
+        raise HTTPException(status_code=400, detail="'text' must be a string")
+    if indent is not None and type(indent) is not int:
+        try:
+            indent = _INDENT_ADAPTER.validate_python(indent)
+        except ValidationError:
+            raise HTTPException(status_code=400, detail="'indent' must be an integer")
+    
+    return text, indent
+
+@app.post(
+    "/api/format",
+    responses={200: {"model": JSONResponse}},
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": JSONInput.model_json_schema()}},
+        }
+    },
+)
+async def format_json(request: Request):
     """
     Format and validate JSON text.
-    - Converts single quotes to double quotes
+    - Converts single quotes to double quotes if the input is not valid JSON
     - Validates JSON structure
     - Returns formatted JSON or error details
     """
+    text, indent = _parse_body(await request.body())
+    
     try:
-        # Replace single quotes with double quotes
-        text = data.text.replace("'", '"')
-        
-        # Try to parse the JSON
-        parsed = json.loads(text)
-        
-        # Format with specified indent
-        formatted = json.dumps(parsed, indent=data.indent, ensure_ascii=False)
+        # Parse (falling back to double-quoting) and format with specified indent
+        formatted = _format(text, indent)
         
-        return JSONResponse(
-            success=True,
-            formatted=formatted
-        )
+        payload = {"success": True, "formatted": formatted}
+        return ORJSONResponse(payload)
     
     except json.JSONDecodeError as e:
         # Extract error details
-        return JSONResponse(
-            success=False,
-            error=f"JSON Error: {e.msg}",
-            error_line=e.lineno,
-            error_column=e.colno
-        )
+        line, column = _error_position(e)
+        return ORJSONResponse({
+            "success": False,
+            "error": f"JSON Error: {e.msg}",
+            "error_line": line,
+            "error_column": column
+        })
     
     except Exception as e:
-        return JSONResponse(
-            success=False,
-            error=f"Error: {str(e)}"
-        )
+        return ORJSONResponse({
+            "success": False,
+            "error": f"Error: {str(e)}"
+        })
 
-@app.get("/", response_class=HTMLResponse)
-async def root():
-    """Serve the HTML interface"""
-    html_content = """
+# HTML interface, encoded once at import time since it never changes
+INDEX_HTML = """
     <!DOCTYPE html>
     <html lang="en">
     <head>
@@ -362,8 +468,24 @@ async def root():
     </body>
     </html>
     """
-    return HTMLResponse(content=html_content)
+_INDEX_BYTES = INDEX_HTML.encode("utf-8")
+_INDEX_HEADERS = {
+    "content-length": str(len(_INDEX_BYTES)),
+    "cache-control": "public, max-age=3600",
+}
+
+@app.get("/", response_class=HTMLResponse)
+async def root():
+    """Serve the HTML interface"""
+    return HTMLResponse(content=_INDEX_BYTES, headers=_INDEX_HEADERS)
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="uvloop",
+        http="httptools",
+        workers=os.cpu_count() or 1
+    )
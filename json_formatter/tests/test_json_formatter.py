@@ -0,0 +1,86 @@
+import inspect
+
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+
+from app import main
+
+client = TestClient(main.app)
+
+
+def test_all_routes_are_async():
+    for route in main.app.routes:
+        if isinstance(route, APIRoute):
+            assert inspect.iscoroutinefunction(route.endpoint), route.path
+
+
+def format_text(text, indent=4):
+    return client.post("/api/format", json={"text": text, "indent": indent}).json()
+
+
+def test_large_integers_are_kept_exactly():
+    for indent in (None, 2, 4):
+        data = format_text('{"a": 123456789012345678901234567890, "b": -9999999999999999999}', indent)
+        assert data["success"]
+        assert "123456789012345678901234567890" in data["formatted"]
+        assert "-9999999999999999999" in data["formatted"]
+
+
+def test_none_indent_matches_json_dumps():
+    assert format_text('{"a":[1,2]}', None)["formatted"] == '{"a": [1, 2]}'
+
+
+def test_single_quotes_are_converted_only_when_needed():
+    assert format_text("{'a': 1}", 2)["formatted"] == '{\n  "a": 1\n}'
+    assert format_text('{"a": "it\'s"}', 2)["formatted"] == '{\n  "a": "it\'s"\n}'
+
+
+def test_decode_error_reports_line_and_column():
+    data = format_text('{"a": 1,\n  "b": x}')
+    assert not data["success"]
+    assert (data["error_line"], data["error_column"]) == (2, 8)
+
+
+def test_indent_is_validated_like_the_old_schema():
+    for indent in (4, 4.0, "4"):
+        assert format_text("[1]", indent)["formatted"] == "[\n    1\n]"
+    assert client.post("/api/format", json={"text": "[1]", "indent": 4.5}).status_code == 400
+    assert client.post("/api/format", json={"text": "[1]", "indent": "four"}).status_code == 400
+
+
+def test_malformed_body_is_rejected():
+    assert client.post("/api/format", content=b"not json").status_code == 400
+    assert client.post("/api/format", json=["text"]).status_code == 400
+    assert client.post("/api/format", json={"indent": 2}).status_code == 400
+    assert client.post("/api/format", json={"text": 1}).status_code == 400
+
+
+def test_format_cache(monkeypatch):
+    main._format_cache.clear()
+    assert format_text('{"cached": true}')["success"]
+    assert format_text('{"cached": true}')["success"]
+    assert format_text('{"cached": true}', 2)["success"]
+    assert len(main._format_cache) == 2
+    
+    monkeypatch.setattr(main, "FORMAT_CACHE_MAX_TEXT", 8)
+    assert format_text('{"too": "long"}')["success"]
+    assert len(main._format_cache) == 2
+
+
+def test_values_only_the_stdlib_parses_are_accepted():
+    for text, expected in (
+        ('{"a": NaN}', "NaN"),
+        ('{"a": NaN, "id": 1234567890123456789}', "NaN"),
+        ('{"a": -Infinity}', "-Infinity"),
+        ('{"a": 1e400}', "Infinity"),
+    ):
+        for indent in (None, 2, 4):
+            data = format_text(text, indent)
+            assert data["success"], (text, indent)
+            assert expected in data["formatted"]
+
+
+def test_float_spelling_does_not_depend_on_indent():
+    for indent in (None, 2, 4):
+        formatted = format_text('{"a": 1e16, "b": 1e-7, "c": 0.5}', indent)["formatted"]
+        assert "1e+16" in formatted and "1e-07" in formatted and "0.5" in formatted
@@ -4,27 +4,60 @@ Markdown to HTML/PDF Converter Microservice
 A FastAPI-based microservice for converting Markdown files to HTML or PDF.
 
 Installation:
-pip install fastapi uvicorn markdown2 weasyprint python-multipart pygments
+pip install fastapi uvicorn markdown2 weasyprint python-multipart pygments orjson
 
 Run:
 uvicorn main:app --host 0.0.0.0 --port 8000 --reload
 """
 
 from fastapi import FastAPI, File, UploadFile, Form, HTTPException
-from fastapi.responses import StreamingResponse, HTMLResponse
+from fastapi.responses import Response, HTMLResponse, ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 import markdown2
-from weasyprint import HTML, CSS
-from io import BytesIO
+import pdf_worker
+from pdf_worker import render_pdf as _render_pdf_worker
 import tempfile
 import os
+import asyncio
+import codecs
+import hashlib
+import multiprocessing
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
 from typing import Optional
 from datetime import datetime
 
+
+def _create_pdf_pool() -> ProcessPoolExecutor:
+    """Create the process pool WeasyPrint renders in"""
+    # Split the CPUs between the uvicorn workers, each of which has its own pool
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    return ProcessPoolExecutor(
+        max_workers=max(1, (os.cpu_count() or 1) // workers),
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run WeasyPrint in a process pool so PDF rendering does not block the event loop"""
+    app.state.pdf_pool = _create_pdf_pool()
+    try:
+        yield
+    finally:
+        app.state.pdf_pool.shutdown(cancel_futures=True)
+
+
 app = FastAPI(
     title="Markdown Converter API",
     description="Convert Markdown to HTML or PDF",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Enable CORS for web clientsuvicorn main:app --host 0.0.0.0 --port 8000 --reload
@@ -36,6 +69,10 @@ app = FastAPI(
 #     allow_headers=["*"],
 # )
 
+# Compress HTML responses; level 1 keeps the CPU cost low. PDF responses are
+# already deflate-compressed internally and opt out via Content-Encoding.
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=1)
+
 # HTML template with professional styling
 HTML_TEMPLATE = """
     <!DOCTYPE html>
@@ -151,55 +188,133 @@ HTML_TEMPLATE = """
     """
 
 
+def _split_template(template: str, *fields: str) -> tuple:
+    """Split a str.format template into UTF-8 encoded static segments around the given fields"""
+    segments = []
+    for field in fields:
+        head, template = template.split("{%s}" % field, 1)
+        segments.append(head)
+    segments.append(template)
+    return tuple(
+        segment.replace("{{", "{").replace("}}", "}").encode("utf-8")
+        for segment in segments
+    )
+
+
+# Static pieces of HTML_TEMPLATE around {title}, {content} and {timestamp}
+_TEMPLATE_SEGMENTS = _split_template(HTML_TEMPLATE, "title", "content", "timestamp")
+
+# Shared markdown2 converter with extras for tables, code blocks, etc.
+# Markdown.convert resets its state on every call; it is only used from the
+# event loop, so a single instance is never shared between threads.
+_MD = markdown2.Markdown(
+    extras=[
+        "fenced-code-blocks",
+        "tables",
+        "break-on-newline",
+        "code-friendly",
+        "cuddled-lists",
+        "header-ids",
+        "strike",
+        "task_list",
+        "footnotes",
+    ]
+)
+
+# Convert a small document touching the heavier extras once at import, so the
+# regexes they compile lazily are ready before the first request
+_MD.convert(
+    "# warm\n\n"
+    "```py\npass\n```\n\n"
+    "| a | b |\n|---|---|\n| 1 | 2 |\n\n"
+    "- [x] done\n\n"
+    "~~old~~ text[^1]\n\n[^1]: note\n"
+)
+
+# Footer timestamp as [epoch second, encoded "%Y-%m-%d %H:%M:%S"], refreshed at most once a second
+_TS_CACHE = [0, b""]
+
+
+def _timestamp() -> bytes:
+    """Return the current local time for the document footer"""
+    now = int(time.time())
+    if now != _TS_CACHE[0]:
+        _TS_CACHE[:] = [now, time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(now)).encode("utf-8")]
+    return _TS_CACHE[1]
+
+
+# Rendered markdown keyed by a digest of the source, least recently used first.
+# Sources longer than RENDER_CACHE_MAX_TEXT characters are never cached.
+RENDER_CACHE_SIZE = 256
+RENDER_CACHE_MAX_TEXT = 256 * 1024
+_render_cache: "OrderedDict[bytes, bytes]" = OrderedDict()
+
+
 class MarkdownConverter:
     """Handle Markdown conversion with advanced features"""
     
     @staticmethod
-    def convert_to_html(md_content: str, title: str = "Document") -> str:
+    def render_markdown(md_content: str) -> bytes:
+        """Render Markdown to a UTF-8 encoded HTML fragment, reusing cached results"""
+        
+        if len(md_content) > RENDER_CACHE_MAX_TEXT:
+            return _MD.convert(md_content).encode("utf-8")
+        
+        key = hashlib.blake2b(md_content.encode("utf-8"), digest_size=16).digest()
+        html_content = _render_cache.get(key)
+        if html_content is not None:
+            _render_cache.move_to_end(key)
+            return html_content
+        
+        html_content = _MD.convert(md_content).encode("utf-8")
+        
+        _render_cache[key] = html_content
+        if len(_render_cache) > RENDER_CACHE_SIZE:
+            _render_cache.popitem(last=False)
+        
+        return html_content
+    
+    @staticmethod
+    def convert_to_html(md_content: str, title: str = "Document") -> bytes:
         """Convert Markdown to HTML with syntax highlighting and extras"""
         
-        # Convert markdown with extras for tables, code blocks, etc.
-        html_content = markdown2.markdown(
-            md_content,
-            extras=[
-                "fenced-code-blocks",
-                "tables",
-                "break-on-newline",
-                "code-friendly",
-                "cuddled-lists",
-                "header-ids",
-                "strike",
-                "task_list",
-                "footnotes",
-            ]
-        )
+        html_content = MarkdownConverter.render_markdown(md_content)
         
         # Wrap in template
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        full_html = HTML_TEMPLATE.format(
-            title=title,
-            content=html_content,
-            timestamp=timestamp
-        )
+        head, after_title, after_content, tail = _TEMPLATE_SEGMENTS
+        full_html = b"".join((
+            head, title.encode("utf-8"),
+            after_title, html_content,
+            after_content, _timestamp(),
+            tail,
+        ))
         
         return full_html
     
     @staticmethod
-    def convert_to_pdf(html_content: str) -> bytes:
-        """Convert HTML to PDF using WeasyPrint"""
-        
-        # Create PDF from HTML
-        pdf_file = BytesIO()
-        HTML(string=html_content).write_pdf(pdf_file)
-        pdf_file.seek(0)
+    def convert_to_pdf(html_content: bytes, target) -> None:
+        """Convert UTF-8 encoded HTML to PDF using WeasyPrint, writing into a file-like target"""
         
-        return pdf_file.getvalue()
+        pdf_worker.convert_to_pdf(html_content, target)
 
 
-@app.get("/", response_class=HTMLResponse)
-async def root():
-    """API documentation and test interface"""
-    return """
+async def render_pdf(html_content: bytes) -> bytes:
+    """Render a PDF in the app's process pool, replacing the pool if a worker died"""
+    pool = app.state.pdf_pool
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(pool, _render_pdf_worker, html_content)
+    except BrokenProcessPool:
+        # A worker was killed (e.g. OOM or a crash inside WeasyPrint), which breaks
+        # the whole pool; this request fails but later ones get a fresh pool
+        if app.state.pdf_pool is pool:
+            app.state.pdf_pool = _create_pdf_pool()
+            pool.shutdown(wait=False, cancel_futures=True)
+        raise
+
+
+# API documentation and test interface, encoded once at import time
+INDEX_HTML = """
     <!DOCTYPE html>
     <html>
     <head>
@@ -350,6 +465,17 @@ async def root():
     </body>
     </html>
     """
+_INDEX_BYTES = INDEX_HTML.encode("utf-8")
+_INDEX_HEADERS = {
+    "content-length": str(len(_INDEX_BYTES)),
+    "cache-control": "public, max-age=3600",
+}
+
+
+@app.get("/", response_class=HTMLResponse)
+async def root():
+    """API documentation and test interface"""
+    return HTMLResponse(content=_INDEX_BYTES, headers=_INDEX_HEADERS)
 
 
 @app.get("/health")
@@ -383,26 +509,25 @@ async def convert_paste(
         raise HTTPException(status_code=400, detail="output_format must be 'html' or 'pdf'")
     
     try:
-        converter = MarkdownConverter()
-        
         # Convert to HTML first
-        html_content = converter.convert_to_html(content, title)
+        html_content = MarkdownConverter.convert_to_html(content, title)
         
         if output_format == "html":
-            return StreamingResponse(
-                BytesIO(html_content.encode('utf-8')),
-                media_type="text/html",
+            return Response(
+                content=html_content,
+                media_type="text/html; charset=utf-8",
                 headers={
                     "Content-Disposition": f"attachment; filename={title.replace(' ', '_')}.html"
                 }
             )
         else:  # PDF
-            pdf_content = converter.convert_to_pdf(html_content)
-            return StreamingResponse(
-                BytesIO(pdf_content),
+            pdf_content = await render_pdf(html_content)
+            return Response(
+                content=pdf_content,
                 media_type="application/pdf",
                 headers={
-                    "Content-Disposition": f"attachment; filename={title.replace(' ', '_')}.pdf"
+                    "Content-Disposition": f"attachment; filename={title.replace(' ', '_')}.pdf",
+                    "Content-Encoding": "identity"
                 }
             )
     
@@ -410,6 +535,46 @@ async def convert_paste(
         raise HTTPException(status_code=500, detail=f"Conversion error: {str(e)}")
 
 
+# Largest accepted upload in bytes, and the size of the chunks it is read in
+MAX_UPLOAD_SIZE = int(os.getenv("MAX_UPLOAD_SIZE", str(10 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+
+class UploadSizeLimitMiddleware:
+    """Reject oversized uploads by their Content-Length, before the multipart parser spools them to disk"""
+    
+    def __init__(self, app, path: str):
+        self.app = app
+        self.path = path
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] == self.path:
+            for name, value in scope["headers"]:
+                # Leave one chunk of headroom for the multipart framing and form fields
+                if name == b"content-length" and value.isdigit() and int(value) > MAX_UPLOAD_SIZE + UPLOAD_CHUNK_SIZE:
+                    response = ORJSONResponse({"detail": "File is too large"}, status_code=413)
+                    await response(scope, receive, send)
+                    return
+        await self.app(scope, receive, send)
+
+
+app.add_middleware(UploadSizeLimitMiddleware, path="/convert/upload")
+
+
+async def read_upload_text(file: UploadFile) -> str:
+    """Decode an uploaded UTF-8 file chunk by chunk, enforcing MAX_UPLOAD_SIZE"""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    parts = []
+    size = 0
+    while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+        size += len(chunk)
+        if size > MAX_UPLOAD_SIZE:
+            raise HTTPException(status_code=413, detail="File is too large")
+        parts.append(decoder.decode(chunk))
+    parts.append(decoder.decode(b"", final=True))
+    return "".join(parts)
+
+
 @app.post("/convert/upload")
 async def convert_upload(
     file: UploadFile = File(..., description="Markdown file to convert"),
@@ -429,40 +594,43 @@ async def convert_upload(
     if output_format not in ["html", "pdf"]:
         raise HTTPException(status_code=400, detail="output_format must be 'html' or 'pdf'")
     
+    if file.size is not None and file.size > MAX_UPLOAD_SIZE:
+        raise HTTPException(status_code=413, detail="File is too large")
+    
     try:
         # Read file content
-        content = await file.read()
-        md_content = content.decode('utf-8')
+        md_content = await read_upload_text(file)
         
         if not md_content.strip():
             raise HTTPException(status_code=400, detail="File is empty")
         
-        converter = MarkdownConverter()
-        
         # Use filename (without extension) as title
         title = os.path.splitext(file.filename)[0] if file.filename else "Document"
         
         # Convert to HTML
-        html_content = converter.convert_to_html(md_content, title)
+        html_content = MarkdownConverter.convert_to_html(md_content, title)
         
         if output_format == "html":
-            return StreamingResponse(
-                BytesIO(html_content.encode('utf-8')),
-                media_type="text/html",
+            return Response(
+                content=html_content,
+                media_type="text/html; charset=utf-8",
                 headers={
                     "Content-Disposition": f"attachment; filename={title.replace(' ', '_')}.html"
                 }
             )
         else:  # PDF
-            pdf_content = converter.convert_to_pdf(html_content)
-            return StreamingResponse(
-                BytesIO(pdf_content),
+            pdf_content = await render_pdf(html_content)
+            return Response(
+                content=pdf_content,
                 media_type="application/pdf",
                 headers={
-                    "Content-Disposition": f"attachment; filename={title.replace(' ', '_')}.pdf"
+                    "Content-Disposition": f"attachment; filename={title.replace(' ', '_')}.pdf",
+                    "Content-Encoding": "identity"
                 }
             )
     
+    except HTTPException:
+        raise
     except UnicodeDecodeError:
         raise HTTPException(status_code=400, detail="File must be a valid text file with UTF-8 encoding")
     except Exception as e:
@@ -471,4 +639,13 @@ async def convert_upload(
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    # Worker processes inherit WEB_CONCURRENCY, which uvicorn also reads itself
+    os.environ.setdefault("WEB_CONCURRENCY", str(os.cpu_count() or 1))
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.environ["WEB_CONCURRENCY"])
+    )
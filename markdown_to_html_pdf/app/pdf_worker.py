@@ -0,0 +1,22 @@
+"""
+WeasyPrint rendering for the PDF process pool.
+
+Pool workers are spawned and only import this module, so it must stay free of
+import-time side effects (no FastAPI app, no markdown warm-up).
+"""
+
+from io import BytesIO
+
+from weasyprint import HTML
+
+
+def convert_to_pdf(html_content: bytes, target) -> None:
+    """Convert UTF-8 encoded HTML to PDF using WeasyPrint, writing into a file-like target"""
+    HTML(file_obj=BytesIO(html_content), encoding="utf-8").write_pdf(target)
+
+
+def render_pdf(html_content: bytes) -> bytes:
+    """Render a PDF inside a pool worker and return it to the parent process"""
+    pdf_file = BytesIO()
+    convert_to_pdf(html_content, pdf_file)
+    return pdf_file.getvalue()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The service module lives in app/ and is imported as main, like in the Docker image
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
@@ -0,0 +1,81 @@
+import inspect
+import os
+
+import pytest
+
+try:
+    import weasyprint  # noqa: F401
+except (ImportError, OSError):
+    # WeasyPrint also needs the Pango/Cairo system libraries installed in the Dockerfile
+    pytest.skip("WeasyPrint is not available", allow_module_level=True)
+
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+
+import main
+
+
+@pytest.fixture
+def client():
+    # Entering the client runs the lifespan, which starts the PDF pool
+    with TestClient(main.app) as client:
+        yield client
+
+
+def test_all_routes_are_async():
+    for route in main.app.routes:
+        if isinstance(route, APIRoute):
+            assert inspect.iscoroutinefunction(route.endpoint), route.path
+
+
+def _crash_worker(html_content):
+    os._exit(1)
+
+
+def test_pdf_pool_is_replaced_after_a_worker_dies(client, monkeypatch):
+    form = {"content": "# Title", "output_format": "pdf"}
+    pool = main.app.state.pdf_pool
+    with monkeypatch.context() as patch:
+        patch.setattr(main, "_render_pdf_worker", _crash_worker)
+        assert client.post("/convert/paste", data=form).status_code == 500
+    assert main.app.state.pdf_pool is not pool
+    
+    response = client.post("/convert/paste", data=form)
+    assert response.status_code == 200
+    assert response.content.startswith(b"%PDF")
+
+
+def test_pdf_response_has_content_length(client):
+    response = client.post("/convert/paste", data={"content": "# Title", "output_format": "pdf"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/pdf"
+    assert int(response.headers["content-length"]) == len(response.content)
+
+
+def test_render_cache(client, monkeypatch):
+    main._render_cache.clear()
+    form = {"content": "# Cached", "output_format": "html"}
+    first = client.post("/convert/paste", data=form)
+    second = client.post("/convert/paste", data=form)
+    assert b"<h1" in first.content and b"<h1" in second.content
+    assert len(main._render_cache) == 1
+    
+    monkeypatch.setattr(main, "RENDER_CACHE_MAX_TEXT", 4)
+    assert client.post("/convert/paste", data={"content": "# Too long", "output_format": "html"}).status_code == 200
+    assert len(main._render_cache) == 1
+
+
+def test_oversized_upload_is_rejected(client, monkeypatch):
+    monkeypatch.setattr(main, "MAX_UPLOAD_SIZE", 16)
+    form = {"output_format": "html"}
+    
+    # Rejected from the Content-Length header before the form is parsed
+    big = {"file": ("big.md", b"#" * (main.UPLOAD_CHUNK_SIZE + 1024))}
+    assert client.post("/convert/upload", data=form, files=big).status_code == 413
+    
+    # Within the header headroom, rejected while the file is read
+    small = {"file": ("small.md", b"# a bit more than sixteen bytes")}
+    assert client.post("/convert/upload", data=form, files=small).status_code == 413
+    
+    ok = {"file": ("ok.md", b"# fits")}
+    assert client.post("/convert/upload", data=form, files=ok).status_code == 200